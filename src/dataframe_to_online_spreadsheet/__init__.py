@@ -0,0 +1,48 @@
+import importlib
+
+import pandas as pd
+
+# Maps an accessor name to the backend module and the accessor class it provides.
+# The backend module is only imported the first time the accessor is used.
+_BACKENDS = {
+    "feishu": (".feishu", "FeishuAccessor"),
+    "wecom": (".wecom", "WecomAccessor"),
+}
+
+_loaded = {}
+
+
+def _load_backend(name):
+    r"""
+    Imports the backend registered under `name` and returns its accessor class.
+    """
+
+    if name not in _loaded:
+        module_name, class_name = _BACKENDS[name]
+        module = importlib.import_module(module_name, __name__)
+        _loaded[name] = getattr(module, class_name)
+    return _loaded[name]
+
+
+class _LazyAccessor(object):
+    r"""
+    A lightweight stand-in registered with pandas. The real accessor, and with it the HTTP stack,
+    is loaded when the accessor is first accessed on a dataframe, or when one of its attributes is looked up
+    on the class, e.g. `pd.DataFrame.feishu.to_spreadsheet`, so introspection still shows the real accessor.
+    """
+
+    def __init__(self, name):
+        self._name = name
+
+    def __call__(self, pandas_obj):
+        return _load_backend(self._name)(pandas_obj)
+
+    def __getattr__(self, name):
+        # Private and special names, e.g. `_name` before `__init__` runs during copy or pickle, aren't forwarded
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(_load_backend(self._name), name)
+
+
+for _name in _BACKENDS:
+    pd.api.extensions.register_dataframe_accessor(_name)(_LazyAccessor(_name))
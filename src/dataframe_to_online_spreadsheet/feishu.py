@@ -1,12 +1,11 @@
 import json
 import logging
-import requests
+import os
 
-import numpy as np
-import pandas as pd
+from .spool import ConcatBody, Spool, SpoolJob, dumps
 
 
-@pd.api.extensions.register_dataframe_accessor("feishu")
+# Registered as `df.feishu` by the package `__init__`, which loads this module on first use.
 class FeishuAccessor:
     def __init__(self, pandas_obj):
         self._validate(pandas_obj)
@@ -18,7 +17,7 @@ class FeishuAccessor:
         # TODO
         pass
 
-    def to_spreadsheet(self, app_id, app_secret, title, sheet_title, manager_ids, spreadsheet_token=None):
+    def to_spreadsheet(self, app_id, app_secret, title, sheet_title, manager_ids, spreadsheet_token=None, spool_dir=None, compress=False, spreadsheet_ref=None):
         r"""
         Converts data to a Feishu spreadsheet.
 
@@ -32,33 +31,39 @@ class FeishuAccessor:
         - title: The title of the spreadsheet.
         - manager_ids: A list of manager IDs to whom permissions will be granted for the spreadsheet.
         - spreadsheet_token: An existing spreadsheet token, if provided, will attempt to add data to this spreadsheet rather than creating a new one.
+        - spool_dir: If provided, nothing is sent. The encoded `valueRanges` chunks are written to this directory instead,
+            to be uploaded later by `dataframe_to_online_spreadsheet.spool.replay`.
+        - compress: Gzip the spooled chunks, `True` or a gzip level from 1 to 9. Only used with `spool_dir`.
+        - spreadsheet_ref: The path returned by an earlier spooled call in the same `spool_dir`. Only used with `spool_dir`.
+            The data is added to the spreadsheet that job creates on replay, like passing its token as `spreadsheet_token`.
 
         Returns:
-        - The token of the spreadsheet after conversion.
+        - The token of the spreadsheet after conversion, or the path of the spooled job if `spool_dir` is provided.
         """
 
-        access_token = self._client.get_access_token(app_id, app_secret)
-
-        # Create a new spreadsheet or reuse an existing one based on whether a spreadsheet token is provided
-        if spreadsheet_token is None:
-            token, _ = self._client.create_spreadsheet(access_token, title)
-        else:
-            token, _ = spreadsheet_token, None
-            # Check if the spreadsheet already has a worksheet with the same title as the data
-            worksheets = self._client.list_worksheets(access_token, token)
-            # If a matching worksheet is found, delete it
-            sheet_id = next((sheet["sheet_id"] for sheet in worksheets if sheet["title"] == sheet_title), None)
-            if sheet_id:
-                self._client.delete_worksheet(access_token, token, sheet_id)
-
-        # Create a new worksheet in the spreadsheet
-        sheet_id = self._client.create_worksheet(access_token, token, sheet_title)
-
-        # Grant "full_access" permissions to each user in the manager_ids list
-        for manager_id in manager_ids:
-            self._client.add_permissions_member(
-                access_token, token, manager_id, "full_access"
+        if spreadsheet_ref is not None and (spool_dir is None or spreadsheet_token is not None):
+            raise FeishuException(-1, "spreadsheet_ref requires spool_dir and can't be used with spreadsheet_token")
+
+        if spool_dir is not None:
+            spool = Spool(
+                spool_dir,
+                "feishu",
+                {
+                    "title": title,
+                    "sheet_title": sheet_title,
+                    "manager_ids": manager_ids,
+                    "spreadsheet_token": spreadsheet_token,
+                    # Only the job name is kept, so the spool directory can be moved to another host
+                    "spreadsheet_ref": os.path.basename(spreadsheet_ref) if spreadsheet_ref is not None else None,
+                },
+                compress,
             )
+            for cell_range, values in self._value_ranges():
+                spool.write(values, range=cell_range)
+            return spool.close()
+
+        access_token = self._client.get_access_token(app_id, app_secret)
+        token, sheet_id = _prepare_worksheet(self._client, access_token, title, sheet_title, manager_ids, spreadsheet_token)
 
         # Batch update data into the spreadsheet
         self._batch_update(access_token, token, sheet_id)
@@ -79,32 +84,28 @@ class FeishuAccessor:
         - sheet_id: The ID of the sheet to be updated.
         """
 
-        # Define the header range of the spreadsheet in the format "sheet_id!A1:Z1", where Z1 represents the column ID of the last column.
-        header_range = f"{sheet_id}!A1:{self._spreadsheet_column_id(self._obj.shape[1])}1"
-        data = {"valueRanges": [{"range": header_range, "values": [self._obj.columns.to_list()]}]}
+        for cell_range, values in self._value_ranges():
+            self._client.batch_update_values(access_token, doc_token, _value_range_body(sheet_id, cell_range, values))
+
+    def _value_ranges(self):
+        r"""
+        Yields the header row and then the data rows in chunks, as (range, values) pairs.
+        The range doesn't include the sheet id, and the values are a JSON array of rows encoded as bytes.
+        """
 
-        # Send the request to update the header.
-        self._client.batch_update_values(access_token, doc_token, data)
+        # Define the header range of the spreadsheet in the format "A1:Z1", where Z1 represents the column ID of the last column.
+        header_range = f"A1:{self._spreadsheet_column_id(self._obj.shape[1])}1"
+        yield header_range, dumps([self._obj.columns.to_list()])
 
         # Define the maximum number of rows per batch. See also: https://open.feishu.cn/document/server-docs/docs/sheets-v3/data-operation/write-data-to-multiple-ranges?lang=en-US
         max_size = 5000
 
-        # Upload the data rows in batches.
+        # Split the data rows into batches.
         for i in range(0, self._obj.shape[0], max_size):
             df = self._obj.iloc[i : i + max_size]
             # Calculate the range for the current batch of data.
-            body_range = f"{sheet_id}!A{i + 2}:{self._spreadsheet_column_id(len(self._obj.columns))}{df.shape[0] + i + 1}"
-            data = {
-                "valueRanges": [
-                    {
-                        "range": body_range,
-                        "values": json.loads(df.to_json(orient='values', date_format='iso', date_unit='s'))
-                    }
-                ]
-            }
-
-            # Send the request to update the data rows.
-            self._client.batch_update_values(access_token, doc_token, data)
+            body_range = f"A{i + 2}:{self._spreadsheet_column_id(len(self._obj.columns))}{df.shape[0] + i + 1}"
+            yield body_range, df.to_json(orient='values', date_format='iso', date_unit='s').encode("utf-8")
 
     def _spreadsheet_column_id(self, col):
         r"""
@@ -126,9 +127,106 @@ class FeishuAccessor:
         return result
 
 
+def _prepare_worksheet(client, access_token, title, sheet_title, manager_ids, spreadsheet_token=None):
+    r"""
+    Creates the spreadsheet, or reuses the existing one, and (re)creates the worksheet to be filled.
+
+    Returns:
+    - The token of the spreadsheet and the ID of the new worksheet.
+    """
+
+    # Create a new spreadsheet or reuse an existing one based on whether a spreadsheet token is provided
+    if spreadsheet_token is None:
+        token, _ = client.create_spreadsheet(access_token, title)
+    else:
+        token, _ = spreadsheet_token, None
+        # Check if the spreadsheet already has a worksheet with the same title as the data
+        worksheets = client.list_worksheets(access_token, token)
+        # If a matching worksheet is found, delete it
+        sheet_id = next((sheet["sheet_id"] for sheet in worksheets if sheet["title"] == sheet_title), None)
+        if sheet_id:
+            client.delete_worksheet(access_token, token, sheet_id)
+
+    # Create a new worksheet in the spreadsheet
+    sheet_id = client.create_worksheet(access_token, token, sheet_title)
+
+    # Grant "full_access" permissions to each user in the manager_ids list
+    for manager_id in manager_ids:
+        client.add_permissions_member(
+            access_token, token, manager_id, "full_access"
+        )
+
+    return token, sheet_id
+
+
+def replay_job(job, app_id, app_secret, session=None, executor=None):
+    r"""
+    Uploads a job spooled by `FeishuAccessor.to_spreadsheet`. See also: `dataframe_to_online_spreadsheet.spool.replay`.
+
+    The worksheet is prepared first, then the spooled chunks are uploaded, concurrently if an executor is given.
+    The chunks are sent as they were encoded, only wrapped into the `valueRanges` request body.
+    The spreadsheet token and sheet id are saved in the job, so a retry reuses them rather than creating them again.
+
+    Returns:
+    - The token of the spreadsheet.
+    """
+
+    client = Client("https://open.feishu.cn", session)
+    access_token = client.get_access_token(app_id, app_secret)
+    params = job.params
+
+    if "sheet_id" not in job.state:
+        token = job.state.get("spreadsheet_token") or params["spreadsheet_token"]
+        if token is None and params.get("spreadsheet_ref"):
+            token = _resolve_spreadsheet_ref(job, params["spreadsheet_ref"])
+        if token is None:
+            token, _ = client.create_spreadsheet(access_token, params["title"])
+            logging.info(f"spreadsheet token: {token}")
+        job.save_state(spreadsheet_token=token)
+        # Passing the token also deletes the worksheet left behind by an earlier, failed attempt
+        _, sheet_id = _prepare_worksheet(client, access_token, params["title"], params["sheet_title"], params["manager_ids"], token)
+        job.save_state(sheet_id=sheet_id)
+
+    token, sheet_id = job.state["spreadsheet_token"], job.state["sheet_id"]
+
+    def upload(entry):
+        if job.is_done(entry):
+            return
+        with job.open(entry) as values:
+            client.batch_update_values(access_token, token, _value_range_body(sheet_id, entry["range"], values))
+        job.mark_done(entry)
+
+    list((executor.map if executor else map)(upload, job.entries))
+    return token
+
+
+def _value_range_body(sheet_id, cell_range, values):
+    r"""
+    Wraps values that are already encoded as a JSON array of rows into a `values_batch_update` request body.
+    """
+
+    return ConcatBody(
+        b'{"valueRanges":[{"range":' + json.dumps(f"{sheet_id}!{cell_range}").encode("utf-8") + b',"values":',
+        values,
+        b"}]}",
+    )
+
+
+def _resolve_spreadsheet_ref(job, ref):
+    r"""
+    Returns the spreadsheet token of the job `ref`, which is spooled next to `job` and replayed before it.
+    """
+
+    path = os.path.join(os.path.dirname(job.path), ref)
+    if not os.path.isdir(path) or not SpoolJob(path).finished:
+        raise FeishuException(-1, f"Referenced spool job is not replayed: {ref}")
+    return SpoolJob(path).result()
+
+
 class Client(object):
-    def __init__(self, host):
+    def __init__(self, host, session=None):
         self._host = host
+        self._session = session
 
     def get_access_token(self, app_id, app_secret):
         r"""
@@ -192,12 +290,23 @@ class Client(object):
             "Authorization": f"Bearer {access_token}",
         }
 
+    def _requests(self):
+        if self._session is not None:
+            return self._session
+        import requests
+
+        return requests
+
     def _post(self, url, headers, payload):
-        response = requests.post(url, headers=headers, json=payload)
+        # The payload is either a dict, or a request body that is already encoded as JSON
+        if isinstance(payload, dict):
+            response = self._requests().post(url, headers=headers, json=payload)
+        else:
+            response = self._requests().post(url, headers=headers, data=payload)
         return self._process_response(response)
 
     def _get(self, url, headers, payload):
-        response = requests.get(url, headers=headers, json=payload)
+        response = self._requests().get(url, headers=headers, json=payload)
         return self._process_response(response)
 
     def _process_response(self, response):
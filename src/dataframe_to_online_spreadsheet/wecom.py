@@ -1,13 +1,13 @@
 import datetime
 import json
 import logging
-import requests
 
-import numpy as np
 import pandas as pd
 
+from .spool import Spool, dumps
 
-@pd.api.extensions.register_dataframe_accessor("wecom")
+
+# Registered as `df.wecom` by the package `__init__`, which loads this module on first use.
 class WecomAccessor:
     def __init__(self, pandas_obj):
         self._validate(pandas_obj)
@@ -19,7 +19,7 @@ class WecomAccessor:
         # TODO
         pass
 
-    def to_spreadsheet(self, app_id, app_secret, doc_id, sheet_id, fields_ids, mode="append"):
+    def to_spreadsheet(self, app_id, app_secret, doc_id, sheet_id, fields_ids, mode="append", spool_dir=None, compress=False):
         r"""
         Converts data to a Wecom smartsheet.
 
@@ -34,16 +34,14 @@ class WecomAccessor:
         - fields_ids: A fields list of the sheet.
             You should use `get_fields` to get the fields ids firstly. See also: https://developer.work.weixin.qq.com/document/path/100229
         - mode: The mode of the operation, such as 'append', 'overwrite'. Default is `append`.
+        - spool_dir: If provided, nothing is sent. The encoded `add_records`/`update_records` payloads are written to this directory instead,
+            to be uploaded later by `dataframe_to_online_spreadsheet.spool.replay`.
+        - compress: Gzip the spooled payloads, `True` or a gzip level from 1 to 9. Only used with `spool_dir`.
 
         Returns:
-        - The new appended records of the smartsheet.
+        - The new appended records of the smartsheet, or the path of the spooled job if `spool_dir` is provided.
         """
 
-        access_token = self._client.get_access_token(app_id, app_secret)
-
-        if mode == "overwrite":
-            self._client.truncate_records(access_token, doc_id, sheet_id)
-
         if "record_id" in self._obj.columns:
             result_to_be_added = self._obj[pd.isna(self._obj["record_id"])].drop("record_id", axis=1)
             result_to_be_updated = self._obj[pd.notna(self._obj["record_id"])]
@@ -51,6 +49,26 @@ class WecomAccessor:
             result_to_be_added = self._obj.copy()
             result_to_be_updated = pd.DataFrame()
 
+        if spool_dir is not None:
+            # Encode both payloads before writing any, so a frame that can't be encoded spools nothing
+            payloads = []
+            if not result_to_be_added.empty:
+                payload = self._client.gen_records_payload(doc_id, sheet_id, fields_ids, result_to_be_added)
+                payloads.append(("add_records", dumps(payload)))
+            if not result_to_be_updated.empty:
+                payload = self._client.gen_records_payload(doc_id, sheet_id, fields_ids, result_to_be_updated, False)
+                payloads.append(("update_records", dumps(payload)))
+
+            spool = Spool(spool_dir, "wecom", {"doc_id": doc_id, "sheet_id": sheet_id, "mode": mode}, compress)
+            for method, data in payloads:
+                spool.write(data, method=method)
+            return spool.close()
+
+        access_token = self._client.get_access_token(app_id, app_secret)
+
+        if mode == "overwrite":
+            self._client.truncate_records(access_token, doc_id, sheet_id)
+
         added = self._client.add_records(
             access_token,
             doc_id,
@@ -70,9 +88,44 @@ class WecomAccessor:
         return added
 
 
+def replay_job(job, app_id, app_secret, session=None, executor=None):
+    r"""
+    Uploads a job spooled by `WecomAccessor.to_spreadsheet`. See also: `dataframe_to_online_spreadsheet.spool.replay`.
+
+    The sheet is truncated first in 'overwrite' mode, then the spooled payloads are sent as they were encoded,
+    concurrently if an executor is given. The truncation and each uploaded payload are recorded in the job,
+    so a retry neither truncates the records added by the earlier attempt nor adds them again.
+
+    Returns:
+    - The new appended records of the smartsheet.
+    """
+
+    client = Client(session=session)
+    access_token = client.get_access_token(app_id, app_secret)
+
+    if job.params["mode"] == "overwrite" and not job.state.get("truncated"):
+        client.truncate_records(access_token, job.params["doc_id"], job.params["sheet_id"])
+        job.save_state(truncated=True)
+
+    def upload(entry):
+        if job.is_done(entry):
+            return entry["method"], job.done_response(entry)
+        with job.open(entry) as payload:
+            records = client.post_records(access_token, entry["method"], payload)
+        job.mark_done(entry, records)
+        return entry["method"], records
+
+    added = None
+    for method, records in (executor.map if executor else map)(upload, job.entries):
+        if method == "add_records":
+            added = records
+    return added
+
+
 class Client(object):
-    def __init__(self, host="https://qyapi.weixin.qq.com"):
+    def __init__(self, host="https://qyapi.weixin.qq.com", session=None):
         self._host = host
+        self._session = session
 
     def get_access_token(self, app_id, app_secret):
         r"""
@@ -131,11 +184,7 @@ class Client(object):
         if df.empty:
             return
         payload = self.gen_records_payload(doc_id, sheet_id, fields_ids, df)
-        resp = self._post(
-            f"{self._host}/cgi-bin/wedoc/smartsheet/add_records?access_token={access_token}",
-            payload,
-        )
-        return resp["records"]
+        return self.post_records(access_token, "add_records", payload)
 
     def truncate_records(self, access_token, doc_id, sheet_id):
         r"""
@@ -180,8 +229,18 @@ class Client(object):
         if df.empty:
             return
         payload = self.gen_records_payload(doc_id, sheet_id, fields_ids, df, False)
+        return self.post_records(access_token, "update_records", payload)
+
+    def post_records(self, access_token, method, payload):
+        r"""
+        Sends a payload generated by `gen_records_payload`, either as a dict or already encoded as JSON.
+        See also: https://developer.work.weixin.qq.com/document/path/100224, https://developer.work.weixin.qq.com/document/path/100226
+        """
+
+        if method not in ("add_records", "update_records"):
+            raise WecomException(-1, f"Unknown records method: {method}")
         resp = self._post(
-            f"{self._host}/cgi-bin/wedoc/smartsheet/update_records?access_token={access_token}",
+            f"{self._host}/cgi-bin/wedoc/smartsheet/{method}?access_token={access_token}",
             payload,
         )
         return resp["records"]
@@ -238,12 +297,23 @@ class Client(object):
         else:
             raise WecomException(-1, f"Unknown field type: {field_type}")
 
+    def _requests(self):
+        if self._session is not None:
+            return self._session
+        import requests
+
+        return requests
+
     def _post(self, url, payload):
-        response = requests.post(url, json=payload)
+        # The payload is either a dict, or a request body that is already encoded as JSON
+        if isinstance(payload, dict):
+            response = self._requests().post(url, json=payload)
+        else:
+            response = self._requests().post(url, headers={"Content-Type": "application/json; charset=utf-8"}, data=payload)
         return self._process_response(response)
 
     def _get(self, url, payload=None):
-        response = requests.get(url, json=payload)
+        response = self._requests().get(url, json=payload)
         return self._process_response(response)
 
     def _process_response(self, response):
@@ -0,0 +1,59 @@
+import pytest
+import logging
+import subprocess
+
+import os
+import sys
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+logging.basicConfig(format=LOG_FORMAT, level=logging.INFO, handlers=[logging.StreamHandler(sys.stdout)])
+
+
+def _import_time(statement):
+    r"""
+    Runs `statement` in a fresh interpreter with `-X importtime` and returns a dict of
+    top-level module name to cumulative import time in microseconds.
+    """
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+@pytest.mark.parametrize("backend", ["feishu", "wecom"])
+def test_import_backend_is_lazy(backend):
+    modules = _import_time(f"import src.dataframe_to_online_spreadsheet.{backend}")
+    logging.info(f"import {backend}: {modules['src.dataframe_to_online_spreadsheet'] / 1000:.1f} ms")
+    assert "requests" not in modules
+
+
+def test_accessor_loads_backend_on_first_use():
+    modules = _import_time(
+        "import sys; import pandas as pd; import src.dataframe_to_online_spreadsheet; "
+        "assert 'src.dataframe_to_online_spreadsheet.feishu' not in sys.modules; "
+        "pd.DataFrame().feishu; "
+        "assert 'src.dataframe_to_online_spreadsheet.feishu' in sys.modules; "
+        "assert 'src.dataframe_to_online_spreadsheet.wecom' not in sys.modules"
+    )
+    assert "requests" not in modules
+
+
+def test_class_level_accessor_introspection():
+    _import_time(
+        "import sys; import pandas as pd; import src.dataframe_to_online_spreadsheet; "
+        "pd.DataFrame.feishu; "
+        "assert 'src.dataframe_to_online_spreadsheet.feishu' not in sys.modules; "
+        "assert 'Feishu spreadsheet' in pd.DataFrame.feishu.to_spreadsheet.__doc__; "
+        "assert 'src.dataframe_to_online_spreadsheet.feishu' in sys.modules"
+    )
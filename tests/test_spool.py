@@ -0,0 +1,206 @@
+import pytest
+import json
+import logging
+from dotenv import load_dotenv
+
+import numpy as np
+import pandas as pd
+
+import os
+import sys
+
+import src.dataframe_to_online_spreadsheet.spool as spool
+import src.dataframe_to_online_spreadsheet.feishu as feishu
+import src.dataframe_to_online_spreadsheet.wecom as wecom
+
+load_dotenv("feishu.env")
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+logging.basicConfig(format=LOG_FORMAT, level=logging.INFO, handlers=[logging.StreamHandler(sys.stdout)])
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_feishu_spool(tmp_path, compress):
+    df = pd.read_csv("./tests/test_data1.csv")
+    path = df.feishu.to_spreadsheet(None, None, title="Daily Report", sheet_title='sheet_name1', manager_ids=['7a7ceg17'], spool_dir=tmp_path, compress=compress)
+
+    jobs = spool.list_jobs(tmp_path)
+    assert [job.path for job in jobs] == [path]
+    assert jobs[0].backend == "feishu"
+    assert jobs[0].params["sheet_title"] == "sheet_name1"
+
+    rows = []
+    for entry in jobs[0].entries:
+        with jobs[0].open(entry) as values:
+            rows.extend(json.loads(bytes(values)))
+    assert jobs[0].entries[0]["range"].startswith("A1:")
+    assert rows[0] == df.columns.to_list()
+    assert len(rows) == df.shape[0] + 1
+
+
+def test_wecom_spool(tmp_path):
+    fields_ids = {"fA": "FIELD_TYPE_TEXT", "fB": "FIELD_TYPE_NUMBER"}
+    df = pd.DataFrame({"record_id": [None, "r1"], "Name": ["ProdA", "ProdB"], "Value": [10, 20]})
+    df.wecom.to_spreadsheet(None, None, "doc", "sheet", fields_ids, spool_dir=tmp_path, compress=True)
+
+    job = spool.list_jobs(tmp_path, "wecom")[0]
+    assert [entry["method"] for entry in job.entries] == ["add_records", "update_records"]
+    with job.open(job.entries[1]) as payload:
+        payload = json.loads(bytes(payload))
+    assert payload == {
+        "docid": "doc",
+        "sheet_id": "sheet",
+        "key_type": "CELL_VALUE_KEY_TYPE_FIELD_ID",
+        "records": [{"record_id": "r1", "values": {"fA": [{"type": "text", "text": "ProdB"}], "fB": 20}}],
+    }
+
+
+def test_incomplete_job_is_skipped(tmp_path):
+    job = spool.Spool(tmp_path, "feishu", {})
+    job.write(spool.dumps([["a"]]), range="A1:A1")
+    assert spool.list_jobs(tmp_path) == []
+
+
+def test_dumps_numpy():
+    assert spool.dumps([np.int64(1), np.float64(0.5)]) == b"[1,0.5]"
+    with pytest.raises(TypeError):
+        spool.dumps(np.array([1, 2]))
+
+
+def test_spool_rejects_infinity(tmp_path):
+    df = pd.DataFrame({"Value": [1.0, float("inf")]})
+    with pytest.raises(ValueError):
+        df.wecom.to_spreadsheet(None, None, "doc", "sheet", {"fA": "FIELD_TYPE_NUMBER"}, spool_dir=tmp_path)
+    assert os.listdir(tmp_path) == []
+
+
+def test_spool_compress_level(tmp_path):
+    df = pd.read_csv("./tests/test_data1.csv")
+    path = df.feishu.to_spreadsheet(None, None, title="Daily Report", sheet_title='sheet_name1', manager_ids=[], spool_dir=tmp_path, compress=1)
+    job = spool.SpoolJob(path)
+    assert all(entry["file"].endswith(".gz") for entry in job.entries)
+    with job.open(job.entries[0]) as values:
+        assert json.loads(bytes(values)) == [df.columns.to_list()]
+
+
+def test_concat_body(tmp_path):
+    job = spool.Spool(tmp_path, "feishu", {})
+    job.write(b"[[1,2],[3,4]]", range="A2:B3")
+    job = spool.SpoolJob(job.close())
+    with job.open(job.entries[0]) as values:
+        body = spool.ConcatBody(b'{"values":', values, b"}")
+        assert len(body) == 24
+        assert body.read(5) + body.read(10) + body.read() == b'{"values":[[1,2],[3,4]]}'
+
+
+class FakeSession(object):
+    r"""
+    Answers the Feishu and Wecom API calls, failing the upload of the payloads listed in `fail`.
+    """
+
+    def __init__(self, fail=()):
+        self.fail = list(fail)
+        self.calls = []
+
+    def post(self, url, **kwargs):
+        path = url.split("?")[0]
+        data = kwargs.get("data")
+        body = kwargs.get("json") if data is None else json.loads(data.read() if hasattr(data, "read") else bytes(data))
+        self.calls.append((path, body))
+        if body in self.fail:
+            self.fail.remove(body)
+            return FakeResponse({"code": 1, "msg": "fail", "errcode": 1, "errmsg": "fail"})
+        if path.endswith("/spreadsheets"):
+            return FakeResponse({"code": 0, "data": {"spreadsheet": {"spreadsheet_token": f"S{len(self.calls)}", "url": ""}}})
+        if path.endswith("/sheets_batch_update"):
+            return FakeResponse({"code": 0, "data": {"replies": [{"addSheet": {"properties": {"sheetId": f"SH{len(self.calls)}"}}}]}})
+        if path.endswith("/values_batch_update"):
+            return FakeResponse({"code": 0, "data": {"spreadsheetToken": ""}})
+        if path.endswith("/get_records"):
+            return FakeResponse({"errcode": 0, "records": [], "has_more": False})
+        if path.endswith("_records"):
+            return FakeResponse({"errcode": 0, "records": [{"record_id": f"r{len(self.calls)}"}]})
+        return FakeResponse({"code": 0, "tenant_access_token": "T"})
+
+    def get(self, url, **kwargs):
+        self.calls.append((url.split("?")[0], kwargs.get("json")))
+        if "gettoken" in url:
+            return FakeResponse({"errcode": 0, "access_token": "T"})
+        return FakeResponse({"code": 0, "data": {"sheets": []}})
+
+
+class FakeResponse(object):
+    status_code = 200
+    text = ""
+
+    def __init__(self, resp):
+        self._resp = resp
+
+    def json(self):
+        return self._resp
+
+
+def test_feishu_upload_sends_encoded_values():
+    df = pd.DataFrame({"Id": [1, 2]})
+    session = FakeSession()
+    accessor = df.feishu
+    accessor._client = feishu.Client("https://open.feishu.cn", session)
+    accessor.to_spreadsheet("a", "b", title="Daily Report", sheet_title='sheet_name1', manager_ids=[])
+    assert [body for path, body in session.calls if path.endswith("/values_batch_update")] == [
+        {"valueRanges": [{"range": "SH3!A1:A1", "values": [["Id"]]}]},
+        {"valueRanges": [{"range": "SH3!A2:A3", "values": [[1], [2]]}]},
+    ]
+
+
+def test_feishu_replay_resumes(tmp_path):
+    df = pd.DataFrame({"Id": range(6000)})
+    first = df.feishu.to_spreadsheet(None, None, title="Daily Report", sheet_title='sheet_name1', manager_ids=[], spool_dir=tmp_path)
+    second = df.feishu.to_spreadsheet(None, None, title="Daily Report", sheet_title='sheet_name2', manager_ids=[], spool_dir=tmp_path, spreadsheet_ref=first)
+    assert spool.SpoolJob(second).params["spreadsheet_ref"] == os.path.basename(first)
+
+    job = spool.SpoolJob(first)
+    with job.open(job.entries[2]) as values:
+        failed_chunk = {"valueRanges": [{"range": "SH4!A5002:A6001", "values": json.loads(bytes(values))}]}
+    session = FakeSession(fail=[failed_chunk])
+    with pytest.raises(feishu.FeishuException):
+        feishu.replay_job(job, "a", "b", session)
+
+    session.calls.clear()
+    job = spool.SpoolJob(first)
+    token = feishu.replay_job(job, "a", "b", session)
+    assert [path.rsplit("/", 1)[-1] for path, _ in session.calls] == ["internal", "values_batch_update"]
+    assert token == job.state["spreadsheet_token"]
+    job.finish(token)
+
+    session.calls.clear()
+    assert feishu.replay_job(spool.SpoolJob(second), "a", "b", session) == token
+    assert not any(path.endswith("/spreadsheets") for path, _ in session.calls)
+
+
+def test_wecom_replay_resumes(tmp_path):
+    fields_ids = {"fA": "FIELD_TYPE_TEXT"}
+    df = pd.DataFrame({"record_id": [None, "r1"], "Name": ["ProdA", "ProdB"]})
+    path = df.wecom.to_spreadsheet(None, None, "doc", "sheet", fields_ids, mode="overwrite", spool_dir=tmp_path)
+
+    job = spool.SpoolJob(path)
+    with job.open(job.entries[1]) as payload:
+        session = FakeSession(fail=[json.loads(bytes(payload))])
+    with pytest.raises(wecom.WecomException):
+        wecom.replay_job(job, "a", "b", session)
+
+    session.calls.clear()
+    added = wecom.replay_job(spool.SpoolJob(path), "a", "b", session)
+    assert [path.rsplit("/", 1)[-1] for path, _ in session.calls] == ["gettoken", "update_records"]
+    assert added == job.done_response(job.entries[0])
+
+
+def test_feishu_replay(tmp_path):
+    app_id = os.getenv("APP_ID")
+    app_secret = os.getenv("APP_SECRET")
+
+    df = pd.read_csv("./tests/test_data1.csv")
+    df.feishu.to_spreadsheet(None, None, title="Daily Report", sheet_title='sheet_name1', manager_ids=['7a7ceg17'], spool_dir=tmp_path, compress=True)
+    tokens = spool.replay(tmp_path, app_id, app_secret)
+    logging.info(f"spreadsheet tokens: {tokens}")
+    assert tokens
+    assert spool.list_jobs(tmp_path) == []